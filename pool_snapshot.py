@@ -0,0 +1,329 @@
+"""
+Columnar snapshots of the in-memory candidate pool.
+
+A snapshot is a directory of .npy arrays plus a small manifest:
+  - every scalar string field is one UTF-8 blob with character offsets
+  - skills are int32 ids into a shared vocabulary, with per-candidate row offsets
+  - experience/education entries are flattened string lists with row offsets
+  - anchor roots/content hashes are (candidates x 32) byte matrices, proof
+    sibling hashes one flat (steps x 32) matrix with position bits and row offsets
+  - resume embeddings are a single float32 (candidates x dim) matrix
+
+Restoring memory-maps those arrays, so no per-record JSON is parsed and no NLP
+model is loaded. Snapshots are written to a temporary sibling directory and
+swapped in, so a failed write never destroys the previous snapshot.
+
+The API only reads and writes snapshots under SNAPSHOT_DIR (default
+"snapshots"); clients pass a name relative to it.
+
+CLI (snapshot/restore talk to a running API server, info reads a local directory):
+  python pool_snapshot.py snapshot latest
+  python pool_snapshot.py restore latest
+  python pool_snapshot.py info snapshots/latest
+"""
+
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+
+SCALAR_FIELDS = ['filename', 'uploaded_at', 'name', 'email', 'phone', 'raw_text']
+
+# (column name, parsed_data key, dict key inside each entry)
+LIST_FIELDS = [
+    ('experience_period', 'experience', 'period'),
+    ('experience_description', 'experience', 'description'),
+    ('education_degree', 'education', 'degree'),
+]
+
+# ================================
+# COLUMN HELPERS
+# ================================
+
+def _row_offsets(lengths: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _write_strings(path: str, column: str, values: List[str]):
+    # Offsets are in characters so the whole column decodes in one call
+    offsets = _row_offsets([len(value) for value in values])
+    blob = ''.join(values).encode('utf-8')
+
+    np.save(os.path.join(path, f"{column}.bytes.npy"), np.frombuffer(blob, dtype=np.uint8))
+    np.save(os.path.join(path, f"{column}.offsets.npy"), offsets)
+
+
+def _read_strings(path: str, column: str) -> List[str]:
+    blob = np.load(os.path.join(path, f"{column}.bytes.npy"), mmap_mode='r')
+    offsets = np.load(os.path.join(path, f"{column}.offsets.npy"), mmap_mode='r')
+
+    data = blob.tobytes().decode('utf-8')
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def _write_hashes(path: str, column: str, hex_values: List[str]):
+    blob = b''.join(bytes.fromhex(value[2:]) for value in hex_values)
+    np.save(os.path.join(path, f"{column}.npy"), np.frombuffer(blob, dtype=np.uint8).reshape(-1, 32))
+
+
+def _read_hashes(path: str, column: str) -> List[str]:
+    data = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r').tobytes()
+    return ['0x' + data[i:i + 32].hex() for i in range(0, len(data), 32)]
+
+# ================================
+# SAVE / LOAD
+# ================================
+
+def resolve_snapshot_path(name: str, root: str = SNAPSHOT_DIR) -> str:
+    """Map a client-supplied snapshot name to a directory inside `root`"""
+    parts = name.replace('\\', '/').split('/')
+    if not name or os.path.isabs(name) or name.startswith(('/', '\\')) or '..' in parts or ':' in name:
+        raise ValueError(f"Invalid snapshot name '{name}'. Use a relative name such as 'latest'.")
+
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, *parts))
+    # Also catches symlinks inside the root that point elsewhere
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Invalid snapshot name '{name}'. Use a relative name such as 'latest'.")
+
+    return path
+
+
+def save_snapshot(candidates: List[Dict[str, Any]], path: str,
+                  embeddings: Optional[np.ndarray] = None,
+                  embedding_model: str = "") -> Dict[str, Any]:
+    """Write the candidate pool to `path` as columnar arrays"""
+    if embeddings is not None and len(embeddings) != len(candidates):
+        raise ValueError("Embedding matrix must have one row per candidate")
+
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+
+    # Never rewrite files in place: a restored pool may still map them, and a
+    # failed write must leave the previous snapshot loadable
+    tmp_path = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.tmp-", dir=parent)
+    try:
+        manifest = _write_columns(candidates, tmp_path, embeddings, embedding_model)
+
+        if os.path.exists(path):
+            old_path = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.old-", dir=parent)
+            os.replace(path, old_path)
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                os.replace(old_path, path)
+                raise
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+def _write_columns(candidates: List[Dict[str, Any]], path: str,
+                   embeddings: Optional[np.ndarray], embedding_model: str) -> Dict[str, Any]:
+    # Scalar string fields
+    for field in SCALAR_FIELDS:
+        if field in ('filename', 'uploaded_at'):
+            values = [c.get(field, "") for c in candidates]
+        else:
+            values = [c['data'].get(field, "") for c in candidates]
+        _write_strings(path, field, values)
+
+    # Skills as ids into a shared vocabulary
+    skill_vocab: Dict[str, int] = {}
+    skill_lists = [c['data'].get('skills', []) for c in candidates]
+    skill_ids = [skill_vocab.setdefault(skill, len(skill_vocab)) for skills in skill_lists for skill in skills]
+    np.save(os.path.join(path, "skills.ids.npy"), np.asarray(skill_ids, dtype=np.int32))
+    np.save(os.path.join(path, "skills.rows.npy"), _row_offsets([len(skills) for skills in skill_lists]))
+
+    # Experience / education entries
+    for column, key, entry_key in LIST_FIELDS:
+        entry_lists = [c['data'].get(key, []) for c in candidates]
+        _write_strings(path, column, [entry.get(entry_key, "") for entries in entry_lists for entry in entries])
+        np.save(os.path.join(path, f"{column}.rows.npy"), _row_offsets([len(entries) for entries in entry_lists]))
+
+    # Anchor proofs (unanchored candidates get zero hashes and leaf_index -1)
+    zero_hash = '0x' + '00' * 32
+    anchors = [c.get('anchor') for c in candidates]
+    _write_hashes(path, "anchor.root", [a['root'] if a else zero_hash for a in anchors])
+    _write_hashes(path, "anchor.content_hash", [a['content_hash'] if a else zero_hash for a in anchors])
+    _write_strings(path, "anchor.hash_algorithm", [a['hash_algorithm'] if a else "" for a in anchors])
+    np.save(os.path.join(path, "anchor.leaf_index.npy"),
+            np.asarray([a['leaf_index'] if a else -1 for a in anchors], dtype=np.int64))
+
+    proofs = [a['proof'] if a else [] for a in anchors]
+    _write_hashes(path, "anchor.proof_hashes", [step['hash'] for proof in proofs for step in proof])
+    np.save(os.path.join(path, "anchor.proof_left.npy"),
+            np.asarray([step['position'] == 'left' for proof in proofs for step in proof], dtype=np.uint8))
+    np.save(os.path.join(path, "anchor.proof_rows.npy"), _row_offsets([len(proof) for proof in proofs]))
+
+    # Embedding matrix
+    embedding_dim = 0
+    if embeddings is not None and len(embeddings):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        embedding_dim = matrix.shape[1]
+        np.save(os.path.join(path, "embeddings.npy"), matrix)
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'count': len(candidates),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'skill_vocab': list(skill_vocab),
+        'embedding_model': embedding_model if embedding_dim else "",
+        'embedding_dim': embedding_dim
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No snapshot found at {path}")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+    return manifest
+
+
+def load_snapshot(path: str) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray], Dict[str, Any]]:
+    """
+    Read a snapshot back into candidate records.
+
+    Returns (candidates, embeddings, manifest). The embedding matrix is a
+    read-only memory map (copy it before keeping rows around), or None if
+    the snapshot was taken without a model.
+    """
+    manifest = load_manifest(path)
+
+    # Building many small dicts triggers repeated GC passes that find nothing to free
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        candidates = _build_candidates(path, manifest)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    embeddings = None
+    if manifest.get('embedding_dim'):
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode='r')
+
+    return candidates, embeddings, manifest
+
+
+def _build_candidates(path: str, manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+    count = manifest['count']
+
+    columns = {field: _read_strings(path, field) for field in SCALAR_FIELDS}
+
+    skill_vocab = manifest['skill_vocab']
+    skill_ids = np.load(os.path.join(path, "skills.ids.npy"), mmap_mode='r').tolist()
+    skill_rows = np.load(os.path.join(path, "skills.rows.npy"), mmap_mode='r').tolist()
+
+    list_columns = {}
+    for column, _, _ in LIST_FIELDS:
+        list_columns[column] = (
+            _read_strings(path, column),
+            np.load(os.path.join(path, f"{column}.rows.npy"), mmap_mode='r').tolist()
+        )
+
+    periods, period_rows = list_columns['experience_period']
+    descriptions, _ = list_columns['experience_description']
+    degrees, degree_rows = list_columns['education_degree']
+
+    anchor_roots = _read_hashes(path, "anchor.root")
+    anchor_content_hashes = _read_hashes(path, "anchor.content_hash")
+    anchor_hash_algorithms = _read_strings(path, "anchor.hash_algorithm")
+    anchor_leaf_indexes = np.load(os.path.join(path, "anchor.leaf_index.npy"), mmap_mode='r').tolist()
+    proof_hashes = _read_hashes(path, "anchor.proof_hashes")
+    proof_positions = ['left' if left else 'right' for left in
+                       np.load(os.path.join(path, "anchor.proof_left.npy"), mmap_mode='r').tolist()]
+    proof_rows = np.load(os.path.join(path, "anchor.proof_rows.npy"), mmap_mode='r').tolist()
+
+    candidates = []
+    for i in range(count):
+        candidate = {
+            "id": i,
+            "filename": columns['filename'][i],
+            "uploaded_at": columns['uploaded_at'][i],
+            "data": {
+                'name': columns['name'][i],
+                'email': columns['email'][i],
+                'phone': columns['phone'][i],
+                'skills': [skill_vocab[s] for s in skill_ids[skill_rows[i]:skill_rows[i + 1]]],
+                'experience': [
+                    {'period': periods[j], 'description': descriptions[j]}
+                    for j in range(period_rows[i], period_rows[i + 1])
+                ],
+                'education': [{'degree': degrees[j]} for j in range(degree_rows[i], degree_rows[i + 1])],
+                'raw_text': columns['raw_text'][i]
+            }
+        }
+        if anchor_leaf_indexes[i] >= 0:
+            candidate["anchor"] = {
+                'root': anchor_roots[i],
+                'hash_algorithm': anchor_hash_algorithms[i],
+                'content_hash': anchor_content_hashes[i],
+                'leaf_index': anchor_leaf_indexes[i],
+                'proof': [
+                    {'hash': proof_hashes[j], 'position': proof_positions[j]}
+                    for j in range(proof_rows[i], proof_rows[i + 1])
+                ]
+            }
+        candidates.append(candidate)
+
+    return candidates
+
+# ================================
+# CLI
+# ================================
+
+def _post(api_url: str, endpoint: str, path: str) -> Dict[str, Any]:
+    data = urllib.parse.urlencode({'path': path}).encode()
+    with urllib.request.urlopen(api_url.rstrip('/') + endpoint, data=data) as response:
+        return json.loads(response.read())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Snapshot and restore the candidate pool")
+    arg_parser.add_argument('command', choices=['snapshot', 'restore', 'info'])
+    arg_parser.add_argument('path', help="Snapshot name under the server's SNAPSHOT_DIR (snapshot/restore) or local directory (info)")
+    arg_parser.add_argument('--api-url', default="http://127.0.0.1:8000", help="Running API server")
+    args = arg_parser.parse_args()
+
+    if args.command == 'info':
+        start = time.perf_counter()
+        candidates, embeddings, manifest = load_snapshot(args.path)
+        manifest['load_seconds'] = round(time.perf_counter() - start, 4)
+        manifest['skill_vocab'] = len(manifest['skill_vocab'])
+        print(json.dumps(manifest, indent=2))
+    else:
+        print(json.dumps(_post(args.api_url, f"/{args.command}", args.path), indent=2))
@@ -0,0 +1,334 @@
+"""
+Batched Merkle-root anchoring for parsed resumes.
+
+Instead of sending one transaction per resume hash, parsed resumes are
+collected into batches, a Merkle tree is built over their content hashes and
+only the root is written on chain (as a CredentialVerifier credential).
+Every resume gets an inclusion proof that can be checked locally against the
+root without a chain call.
+
+Run `python resume_anchor.py --leaves 100000` to benchmark proof generation
+and verification, add `--rpc-url http://127.0.0.1:8545` to also anchor the
+benchmark root on a local Ganache/Truffle network.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from eth_utils import keccak as _keccak
+except ImportError:
+    _keccak = None
+
+# ================================
+# HASHING
+# ================================
+
+# Domain separation so a leaf can never be passed off as an internal node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+HASH_FUNCTIONS: Dict[str, Callable[[bytes], bytes]] = {
+    'sha256': lambda data: hashlib.sha256(data).digest(),
+}
+if _keccak is not None:
+    HASH_FUNCTIONS['keccak256'] = lambda data: bytes(_keccak(data))
+
+# Same hash the frontend uses for resume/credential hashes (web3.utils.keccak256).
+# Pinned so roots never depend on which packages happen to be installed.
+DEFAULT_HASH = 'keccak256'
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blockchain', 'build', 'contracts')
+
+
+def get_hash_function(hash_name: str) -> Callable[[bytes], bytes]:
+    if hash_name == 'keccak256' and _keccak is None:
+        raise ImportError("keccak256 hashing requires eth_utils. Install with: pip install web3")
+    if hash_name not in HASH_FUNCTIONS:
+        raise ValueError(f"Unsupported hash algorithm '{hash_name}'. Available: {', '.join(HASH_FUNCTIONS)}")
+    return HASH_FUNCTIONS[hash_name]
+
+
+def hash_resume(parsed_data: Dict[str, Any], hash_name: str = DEFAULT_HASH) -> bytes:
+    """Content hash of a parsed resume (canonical JSON, sorted keys)"""
+    canonical = json.dumps(parsed_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return get_hash_function(hash_name)(canonical.encode('utf-8'))
+
+# ================================
+# MERKLE TREE
+# ================================
+
+class MerkleTree:
+    """
+    Binary Merkle tree over 32-byte content hashes.
+
+    An unpaired node at the end of a level is promoted unchanged to the next
+    level rather than duplicated, so no two leaf sets share a root.
+    """
+
+    def __init__(self, content_hashes: List[bytes], hash_name: str = DEFAULT_HASH):
+        if not content_hashes:
+            raise ValueError("Cannot build a Merkle tree without leaves")
+
+        self.hash_name = hash_name
+        hash_fn = get_hash_function(hash_name)
+
+        level = [hash_fn(LEAF_PREFIX + content_hash) for content_hash in content_hashes]
+        self.levels: List[List[bytes]] = [level]
+
+        while len(level) > 1:
+            next_level = [
+                hash_fn(NODE_PREFIX + level[i] + level[i + 1])
+                for i in range(0, len(level) - 1, 2)
+            ]
+            if len(level) % 2:
+                next_level.append(level[-1])
+            self.levels.append(next_level)
+            level = next_level
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def get_proof(self, index: int) -> List[Dict[str, str]]:
+        """Sibling path from leaf `index` up to the root"""
+        if index < 0 or index >= len(self):
+            raise IndexError(f"Leaf index {index} out of range")
+
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append({
+                    'hash': '0x' + level[sibling].hex(),
+                    'position': 'left' if sibling < index else 'right'
+                })
+            index //= 2
+
+        return proof
+
+
+def verify_proof(content_hash: bytes, proof: List[Dict[str, str]], root: bytes,
+                 hash_name: str = DEFAULT_HASH) -> bool:
+    """Check an inclusion proof locally, without touching the chain"""
+    hash_fn = get_hash_function(hash_name)
+
+    node = hash_fn(LEAF_PREFIX + content_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'][2:] if step['hash'].startswith('0x') else step['hash'])
+        if step['position'] == 'left':
+            node = hash_fn(NODE_PREFIX + sibling + node)
+        else:
+            node = hash_fn(NODE_PREFIX + node + sibling)
+
+    return node == root
+
+# ================================
+# CHAIN SUBMISSION
+# ================================
+
+class ChainAnchor:
+    """
+    Writes batch roots to the deployed CredentialVerifier contract.
+
+    Pass an existing `web3` instance (e.g. one backed by Ganache or
+    EthereumTesterProvider) or an RPC URL. Unless `address` is given, the
+    contract address is read from the Truffle build artifacts for the
+    connected network.
+    """
+
+    def __init__(self, rpc_url: str = "http://127.0.0.1:8545", web3=None,
+                 contract_name: str = "CredentialVerifier", account: Optional[str] = None,
+                 build_dir: str = BUILD_DIR, address: Optional[str] = None):
+        if web3 is None:
+            from web3 import Web3
+            web3 = Web3(Web3.HTTPProvider(rpc_url))
+
+        self.web3 = web3
+
+        with open(os.path.join(build_dir, f"{contract_name}.json")) as f:
+            artifact = json.load(f)
+
+        if address is None:
+            network_id = str(web3.net.version)
+            deployment = artifact.get('networks', {}).get(network_id)
+            if not deployment:
+                raise ValueError(f"{contract_name} is not deployed on network {network_id}. Run `truffle migrate` first.")
+            address = deployment['address']
+
+        self.contract = web3.eth.contract(address=address, abi=artifact['abi'])
+        self.account = account or web3.eth.accounts[0]
+
+    def anchor_root(self, root: bytes, leaf_count: int, manifest_uri: str = "") -> Dict[str, Any]:
+        """
+        Issue the batch root as a single credential and wait for the receipt.
+
+        The same leaf set always gives the same root, and issueCredential
+        reverts on a duplicate hash, so a root that is already on chain is
+        reused instead of resubmitted.
+        """
+        exists, _, issuer = self.contract.functions.verifyCredentialByHash(root).call()
+        if exists:
+            return {
+                'transaction_hash': None,
+                'block_number': None,
+                'gas_used': 0,
+                'already_anchored': True,
+                'issuer': issuer
+            }
+
+        tx_hash = self.contract.functions.issueCredential(
+            root,
+            manifest_uri or f"merkle-batch:0x{root.hex()}",
+            self.account,
+            "resume-merkle-root",
+            f"Resume batch ({leaf_count} resumes)"
+        ).transact({'from': self.account})
+        receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+
+        return {
+            'transaction_hash': '0x' + bytes(receipt['transactionHash']).hex(),
+            'block_number': receipt['blockNumber'],
+            'gas_used': receipt['gasUsed'],
+            'already_anchored': False,
+            'issuer': self.account
+        }
+
+# ================================
+# BATCH ANCHORER
+# ================================
+
+class BatchAnchorer:
+    """
+    Collects parsed resumes and seals them into Merkle batches.
+
+    A batch is sealed automatically once `batch_size` resumes have been added,
+    or explicitly with `flush()`; `seal()` anchors an exact set of resumes as
+    one batch. When a `ChainAnchor` is configured the root of every sealed
+    batch is submitted on chain, and a failed submission raises with the
+    resumes still unanchored.
+
+    Batches are identified by their root. Only their metadata is kept in
+    `batches`; the proofs are returned to the caller and not retained.
+    """
+
+    def __init__(self, batch_size: int = 1024, chain: Optional[ChainAnchor] = None,
+                 hash_name: str = DEFAULT_HASH):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.batch_size = batch_size
+        self.chain = chain
+        self.hash_name = hash_name
+        self.pending: List[bytes] = []
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a resume; returns its content hash and, if sealed, the batch"""
+        content_hash = hash_resume(parsed_data, self.hash_name)
+        self.pending.append(content_hash)
+
+        batch = self.flush() if len(self.pending) >= self.batch_size else None
+        return {
+            'content_hash': '0x' + content_hash.hex(),
+            'batch': batch
+        }
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """Seal pending resumes into a batch and anchor its root"""
+        if not self.pending:
+            return None
+
+        # Pending hashes are only dropped once the batch is sealed (and anchored)
+        batch = self._seal_hashes(self.pending)
+        self.pending = []
+        return batch
+
+    def seal(self, parsed_resumes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Anchor exactly these resumes as one batch, regardless of batch_size"""
+        if not parsed_resumes:
+            raise ValueError("Cannot seal an empty batch")
+
+        return self._seal_hashes([hash_resume(parsed_data, self.hash_name) for parsed_data in parsed_resumes])
+
+    def _seal_hashes(self, content_hashes: List[bytes]) -> Dict[str, Any]:
+        tree = MerkleTree(content_hashes, self.hash_name)
+
+        batch = {
+            'root': '0x' + tree.root.hex(),
+            'hash_algorithm': self.hash_name,
+            'leaf_count': len(tree),
+            'anchor': None,
+            'proofs': [
+                {
+                    'content_hash': '0x' + content_hash.hex(),
+                    'leaf_index': i,
+                    'proof': tree.get_proof(i)
+                }
+                for i, content_hash in enumerate(content_hashes)
+            ],
+            'sealed_at': time.time()
+        }
+
+        if self.chain is not None:
+            batch['anchor'] = self.chain.anchor_root(tree.root, len(tree))
+
+        self.batches[batch['root']] = {key: value for key, value in batch.items() if key != 'proofs'}
+        return batch
+
+# ================================
+# BENCHMARK
+# ================================
+
+def run_benchmark(leaf_count: int = 100_000, hash_name: str = DEFAULT_HASH,
+                  rpc_url: Optional[str] = None) -> Dict[str, Any]:
+    hash_fn = get_hash_function(hash_name)
+    content_hashes = [hash_fn(i.to_bytes(8, 'big')) for i in range(leaf_count)]
+
+    start = time.perf_counter()
+    tree = MerkleTree(content_hashes, hash_name)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proofs = [tree.get_proof(i) for i in range(leaf_count)]
+    proof_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    valid = all(verify_proof(content_hashes[i], proofs[i], tree.root, hash_name) for i in range(leaf_count))
+    verify_seconds = time.perf_counter() - start
+
+    results = {
+        'leaves': leaf_count,
+        'hash_algorithm': hash_name,
+        'root': '0x' + tree.root.hex(),
+        'all_proofs_valid': valid,
+        'max_proof_length': max(len(p) for p in proofs),
+        'build_seconds': round(build_seconds, 3),
+        'proof_generation_seconds': round(proof_seconds, 3),
+        'proof_verification_seconds': round(verify_seconds, 3),
+        'proof_generation_us_per_leaf': round(proof_seconds / leaf_count * 1e6, 2),
+        'proof_verification_us_per_leaf': round(verify_seconds / leaf_count * 1e6, 2)
+    }
+
+    if rpc_url:
+        results['anchor'] = ChainAnchor(rpc_url=rpc_url).anchor_root(tree.root, leaf_count)
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark Merkle batch anchoring of resume hashes")
+    arg_parser.add_argument('--leaves', type=int, default=100_000, help="Number of resume hashes in the batch")
+    arg_parser.add_argument('--hash', default=DEFAULT_HASH, choices=['keccak256', 'sha256'], help="Hash algorithm")
+    arg_parser.add_argument('--rpc-url', default=None, help="Also anchor the root on this node (e.g. Ganache)")
+    args = arg_parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.leaves, args.hash, args.rpc_url), indent=2))
@@ -2,6 +2,8 @@ import spacy
 import re
 import json
 import io
+import os
+import unicodedata
 import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -20,6 +22,12 @@ from sklearn.metrics.pairwise import cosine_similarity
 import PyPDF2
 from docx import Document
 
+# Blockchain anchoring
+from resume_anchor import BatchAnchorer, ChainAnchor
+
+# Candidate pool snapshots
+from pool_snapshot import save_snapshot, load_snapshot, resolve_snapshot_path
+
 # ================================
 # PYDANTIC MODELS
 # ================================
@@ -50,13 +58,72 @@ class MatchResult(BaseModel):
 # ================================
 
 class ResumeParser:
-    def __init__(self):
+    # 'full': full en_core_web_sm pipeline on every resume
+    # 'fast': header-line heuristics first, NER-only pipeline as fallback
+    NAME_EXTRACTION_MODES = ('full', 'fast')
+    
+    # First lines that are document titles rather than the candidate's name
+    DOCUMENT_HEADINGS = {'resume', 'résumé', 'curriculum vitae', 'cv', 'biodata', 'bio-data'}
+    
+    # Words that make a title-cased header line a job title / section, not a name
+    NON_NAME_WORDS = {
+        'resume', 'curriculum', 'vitae', 'profile', 'summary', 'objective', 'contact',
+        'experience', 'education', 'skills', 'projects', 'references', 'email', 'phone',
+        'address', 'engineer', 'developer', 'scientist', 'analyst', 'manager', 'designer',
+        'consultant', 'architect', 'intern', 'student', 'senior', 'junior', 'lead',
+        'software', 'data', 'full', 'stack', 'university', 'college', 'institute',
+        'inc', 'ltd', 'llc', 'technologies', 'solutions', 'personal', 'details',
+        'information'
+    }
+    
+    # Titles NER leaves out of the PERSON span ("Dr. Jane Doe" -> "Jane Doe")
+    HONORIFICS = {'mr', 'mrs', 'ms', 'miss', 'mx', 'dr', 'prof', 'sir', 'dame', 'rev'}
+    
+    # Lowercase particles allowed between the first and last name
+    NAME_PARTICLES = {
+        'van', 'von', 'der', 'den', 'de', 'del', 'della', 'da', 'di', 'du', 'la', 'le',
+        'bin', 'bint', 'ibn', 'al', 'el', 'dos', 'das'
+    }
+    
+    def __init__(self, name_extraction: str = "full"):
+        if name_extraction not in self.NAME_EXTRACTION_MODES:
+            raise ValueError(f"Unknown name extraction mode '{name_extraction}'. Use one of {self.NAME_EXTRACTION_MODES}")
+        self.name_extraction = name_extraction
+        
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except IOError:
+            if name_extraction == 'fast':
+                # Tagger, parser, lemmatizer etc. are never loaded, not just disabled
+                config = self._load_model_config("en_core_web_sm")
+                needed = self._ner_components(config)
+                exclude = [name for name in config["nlp"]["pipeline"] if name not in needed]
+                self.nlp = spacy.load("en_core_web_sm", exclude=exclude)
+            else:
+                self.nlp = spacy.load("en_core_web_sm")
+        except (IOError, ImportError):
             print("SpaCy model not found. Install with: python -m spacy download en_core_web_sm")
             self.nlp = None
     
+    def _load_model_config(self, model_name: str):
+        # Reads only config.cfg from the installed model package, no weights
+        package_path = spacy.util.get_package_path(model_name)
+        model_path = package_path / f"{model_name}-{spacy.util.get_package_version(model_name)}"
+        return spacy.util.load_config(model_path / "config.cfg", interpolate=False)
+    
+    def _ner_components(self, config) -> List[str]:
+        """'ner' plus the shared tok2vec it listens to, if any"""
+        components = config["components"]
+        needed = ["ner"]
+        
+        ner_tok2vec = components.get("ner", {}).get("model", {}).get("tok2vec", {})
+        if "Listener" in ner_tok2vec.get("@architectures", ""):
+            upstream = ner_tok2vec.get("upstream", "*")
+            needed += [
+                name for name in config["nlp"]["pipeline"]
+                if name == upstream or (upstream == "*" and components[name].get("factory") in ("tok2vec", "transformer"))
+            ]
+        
+        return needed
+    
     def extract_text_from_pdf(self, pdf_file) -> str:
         try:
             pdf_reader = PyPDF2.PdfReader(pdf_file)
@@ -89,20 +156,105 @@ class ResumeParser:
         phones = re.findall(phone_pattern, text)
         return ''.join(phones[0]) if phones else ""
     
-    def extract_name(self, text: str) -> str:
-        if not self.nlp:
-            # Fallback: extract from first few lines
-            lines = text.split('\n')[:3]
-            for line in lines:
-                line = line.strip()
-                if len(line) > 5 and len(line) < 50 and not '@' in line:
-                    return line
+    def _ascii_letters(self, text: str) -> str:
+        # "Zoë O'Neil" -> "zoeoneil"
+        decomposed = unicodedata.normalize('NFKD', text.lower())
+        return ''.join(c for c in decomposed if 'a' <= c <= 'z')
+    
+    def _is_name_shaped(self, candidate: str) -> bool:
+        tokens = candidate.split()
+        if not 2 <= len(tokens) <= 4 or len(candidate) > 40:
+            return False
+        
+        for i, token in enumerate(tokens):
+            if 0 < i < len(tokens) - 1 and token in self.NAME_PARTICLES:
+                continue
+            letters = token.replace("'", "").replace("-", "").replace(".", "")
+            if not letters.isalpha() or not token[0].isupper() or letters.lower() in self.NON_NAME_WORDS:
+                return False
+        
+        return True
+    
+    def extract_name_from_header(self, text: str) -> str:
+        """
+        Return the first header line only when it is very likely the name, else "" (inconclusive).
+        
+        A line must look like a name and share a name token with the email address in the
+        header, so job titles or section headings above the name fall through to NER.
+        """
+        header = text[:500]
+        email = self.extract_email(header)
+        if not email:
+            return ""
+        email_letters = self._ascii_letters(email.split('@')[0])
+        
+        lines = [line.strip() for line in header.split('\n')[:10] if line.strip()][:3]
+        for line in lines:
+            if line.lower().rstrip(':') in self.DOCUMENT_HEADINGS:
+                continue
+            
+            # "Jane Doe | jane@mail.com | ..." -> "Jane Doe"
+            candidate = re.split(r'\s*[|•·\t]\s*|\s+[-–]\s+', line)[0].strip()
+            
+            # "Dr. Jane Doe" -> "Jane Doe", matching the PERSON span NER returns
+            tokens = candidate.split()
+            while tokens and tokens[0].rstrip('.').lower() in self.HONORIFICS:
+                tokens = tokens[1:]
+            candidate = ' '.join(tokens)
+            
+            if not self._is_name_shaped(candidate):
+                return ""
+            
+            name_tokens = [self._ascii_letters(token) for token in candidate.split() if token not in self.NAME_PARTICLES]
+            if any(len(token) >= 3 and token in email_letters for token in name_tokens):
+                return candidate
             return ""
         
-        doc = self.nlp(text[:500])
+        return ""
+    
+    def _extract_name_from_lines(self, text: str) -> str:
+        # Fallback: extract from first few lines
+        lines = text.split('\n')[:3]
+        for line in lines:
+            line = line.strip()
+            if len(line) > 5 and len(line) < 50 and not '@' in line:
+                return line
+        return ""
+    
+    def _person_from_doc(self, doc) -> str:
         names = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
         return names[0] if names else ""
     
+    def extract_name(self, text: str) -> str:
+        if self.name_extraction == 'fast':
+            name = self.extract_name_from_header(text)
+            if name:
+                return name
+        
+        if not self.nlp:
+            return self._extract_name_from_lines(text)
+        
+        return self._person_from_doc(self.nlp(text[:500]))
+    
+    def extract_names(self, texts: List[str], batch_size: int = 64) -> List[str]:
+        """Batched extract_name: resumes the header heuristic can't settle go through nlp.pipe together"""
+        if self.name_extraction == 'fast':
+            names = [self.extract_name_from_header(text) for text in texts]
+        else:
+            names = [""] * len(texts)
+        
+        pending = [i for i, name in enumerate(names) if not name]
+        if not self.nlp:
+            for i in pending:
+                names[i] = self._extract_name_from_lines(texts[i])
+            return names
+        
+        docs = self.nlp.pipe((texts[i][:500] for i in pending), batch_size=batch_size)
+        for i, doc in zip(pending, docs):
+            names[i] = self._person_from_doc(doc)
+        
+        return names
+    
     def extract_skills(self, text: str) -> List[str]:
         skill_keywords = [
             # Programming languages
@@ -169,7 +321,7 @@ class ResumeParser:
         
         return education
     
-    def parse_resume(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+    def extract_text(self, file_content: bytes, filename: str) -> str:
         # Determine file type
         file_type = filename.lower().split('.')[-1] if '.' in filename else 'txt'
         
@@ -181,9 +333,12 @@ class ResumeParser:
         else:
             text = file_content.decode('utf-8', errors='ignore')
         
+        return text
+    
+    def build_parsed_data(self, text: str, name: str) -> Dict[str, Any]:
         # Extract structured information
         parsed_data = {
-            'name': self.extract_name(text),
+            'name': name,
             'email': self.extract_email(text),
             'phone': self.extract_phone(text),
             'skills': self.extract_skills(text),
@@ -193,16 +348,31 @@ class ResumeParser:
         }
         
         return parsed_data
+    
+    def parse_resume(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        text = self.extract_text(file_content, filename)
+        return self.build_parsed_data(text, self.extract_name(text))
+    
+    def parse_resumes(self, files: List[tuple]) -> List[Dict[str, Any]]:
+        """Parse several (file_content, filename) pairs, batching name extraction"""
+        texts = [self.extract_text(file_content, filename) for file_content, filename in files]
+        names = self.extract_names(texts)
+        return [self.build_parsed_data(text, name) for text, name in zip(texts, names)]
 
 # ================================
 # JOB MATCHER CLASS
 # ================================
 
 class JobMatcher:
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+
     def __init__(self):
+        # Resume embeddings keyed by cleaned resume text (filled on demand or from a snapshot)
+        self.embedding_cache: Dict[str, np.ndarray] = {}
+
         print("Loading sentence transformer model...")
         try:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = SentenceTransformer(self.MODEL_NAME)
             print("Model loaded successfully!")
         except Exception as e:
             print(f"Error loading model: {e}")
@@ -264,16 +434,23 @@ class JobMatcher:
         
         return min(estimated_years / required_years, 1.0) if required_years > 0 else 1.0
     
+    def clean_text(self, text: str) -> str:
+        return re.sub(r'\s+', ' ', text).strip()[:1000]
+    
+    def get_resume_embedding(self, resume_text: str) -> np.ndarray:
+        resume_clean = self.clean_text(resume_text)
+        if resume_clean not in self.embedding_cache:
+            self.embedding_cache[resume_clean] = self.model.encode([resume_clean])[0]
+        return self.embedding_cache[resume_clean]
+    
     def calculate_semantic_similarity(self, resume_text: str, jd_text: str) -> float:
         if not self.model:
             return 0.0
         
         try:
-            resume_clean = re.sub(r'\s+', ' ', resume_text).strip()[:1000]
-            jd_clean = re.sub(r'\s+', ' ', jd_text).strip()[:1000]
-            
-            embeddings = self.model.encode([resume_clean, jd_clean])
-            similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
+            resume_embedding = self.get_resume_embedding(resume_text)
+            jd_embedding = self.model.encode([self.clean_text(jd_text)])[0]
+            similarity = cosine_similarity([resume_embedding], [jd_embedding])[0][0]
             return float(similarity)
         except Exception as e:
             print(f"Error calculating semantic similarity: {e}")
@@ -343,12 +520,24 @@ app.add_middleware(
 )
 
 # Initialize global components
-resume_parser = ResumeParser()
+resume_parser = ResumeParser(name_extraction=os.environ.get("NAME_EXTRACTION_MODE", "full"))
 job_matcher = JobMatcher()
 
 # Store candidates in memory (in production, use a database)
 candidates_db = []
 
+# Batch anchoring of resume hashes (roots go on chain; requires BLOCKCHAIN_RPC_URL)
+chain_anchor = None
+chain_anchor_error = "BLOCKCHAIN_RPC_URL is not set"
+if os.environ.get("BLOCKCHAIN_RPC_URL"):
+    try:
+        chain_anchor = ChainAnchor(rpc_url=os.environ["BLOCKCHAIN_RPC_URL"])
+        chain_anchor_error = None
+    except Exception as e:
+        chain_anchor_error = f"Error connecting to blockchain: {e}"
+        print(chain_anchor_error)
+resume_anchorer = BatchAnchorer(chain=chain_anchor)
+
 # ================================
 # API ENDPOINTS
 # ================================
@@ -362,8 +551,12 @@ async def root():
             "parse_resume": "/parse-resume",
             "match_job": "/match-job",
             "upload_resume": "/upload-resume",
+            "upload_resumes": "/upload-resumes",
             "rank_candidates": "/rank-candidates",
-            "get_candidates": "/candidates"
+            "get_candidates": "/candidates",
+            "anchor_candidates": "/anchor-candidates",
+            "snapshot": "/snapshot",
+            "restore": "/restore"
         }
     }
 
@@ -420,6 +613,38 @@ async def upload_resume(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading resume: {str(e)}")
 
+@app.post("/upload-resumes")
+async def upload_resumes(files: List[UploadFile] = File(...)):
+    """Upload several resumes at once; names are extracted in one NLP batch"""
+    try:
+        contents = [(await file.read(), file.filename) for file in files]
+        parsed_resumes = resume_parser.parse_resumes(contents)
+        
+        uploaded = []
+        for (_, filename), parsed_data in zip(contents, parsed_resumes):
+            candidate = {
+                "id": len(candidates_db),
+                "filename": filename,
+                "uploaded_at": datetime.now().isoformat(),
+                "data": parsed_data
+            }
+            candidates_db.append(candidate)
+            uploaded.append({
+                "candidate_id": candidate["id"],
+                "candidate_name": parsed_data.get("name", "Unknown"),
+                "skills_found": len(parsed_data.get("skills", []))
+            })
+        
+        return {
+            "status": "success",
+            "message": f"{len(uploaded)} resumes uploaded and parsed successfully",
+            "candidates": uploaded,
+            "total_candidates": len(candidates_db)
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error uploading resumes: {str(e)}")
+
 @app.post("/match-job")
 async def match_job_endpoint(
     job_title: str = Form(...),
@@ -563,12 +788,108 @@ async def clear_all_candidates():
     """Clear all candidates from database"""
     count = len(candidates_db)
     candidates_db.clear()
+    job_matcher.embedding_cache.clear()
     
     return {
         "status": "success",
         "message": f"All {count} candidates cleared from database"
     }
 
+@app.post("/anchor-candidates")
+def anchor_candidates():
+    """Anchor all not-yet-anchored candidates under a single Merkle root"""
+    # Plain def: the web3 calls block, so FastAPI runs this in its threadpool
+    if resume_anchorer.chain is None:
+        raise HTTPException(status_code=503, detail=f"Blockchain not available: {chain_anchor_error}")
+
+    pending = [candidate for candidate in candidates_db if "anchor" not in candidate]
+    if not pending:
+        raise HTTPException(status_code=400, detail="No unanchored candidates found.")
+
+    try:
+        # One tree over exactly the pending candidates; raises (leaving them pending) if the chain call fails
+        batch = resume_anchorer.seal([candidate["data"] for candidate in pending])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error anchoring candidates: {str(e)}")
+
+    if batch["anchor"] is None:
+        raise HTTPException(status_code=503, detail="Batch root was not anchored on chain")
+
+    for proof in batch["proofs"]:
+        pending[proof["leaf_index"]]["anchor"] = {
+            "root": batch["root"],
+            "hash_algorithm": batch["hash_algorithm"],
+            **proof
+        }
+
+    return {
+        "status": "success",
+        "root": batch["root"],
+        "candidates_anchored": batch["leaf_count"],
+        "on_chain": batch["anchor"]
+    }
+
+@app.post("/snapshot")
+async def snapshot_candidates(path: str = Form("latest")):
+    """Write the candidate pool (and resume embeddings) to a columnar snapshot under SNAPSHOT_DIR"""
+    try:
+        snapshot_path = resolve_snapshot_path(path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        embeddings = None
+        if job_matcher.model and candidates_db:
+            embeddings = np.stack([
+                job_matcher.get_resume_embedding(candidate["data"]["raw_text"])
+                for candidate in candidates_db
+            ])
+        
+        manifest = save_snapshot(candidates_db, snapshot_path, embeddings, JobMatcher.MODEL_NAME)
+        
+        return {
+            "status": "success",
+            "path": path,
+            "candidates_saved": manifest["count"],
+            "embedding_dim": manifest["embedding_dim"],
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving snapshot: {str(e)}")
+
+@app.post("/restore")
+async def restore_candidates(path: str = Form("latest")):
+    """Replace the candidate pool with the contents of a snapshot under SNAPSHOT_DIR"""
+    try:
+        candidates, embeddings, manifest = load_snapshot(resolve_snapshot_path(path))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No snapshot named '{path}'")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading snapshot: {str(e)}")
+    
+    candidates_db[:] = candidates
+    job_matcher.embedding_cache.clear()
+    if embeddings is not None:
+        # Copy out of the memory map: a later /snapshot to the same name replaces these files
+        embeddings = np.array(embeddings)
+    
+    # Embeddings from a different model would give meaningless similarities
+    embeddings_restored = embeddings is not None and manifest["embedding_model"] == JobMatcher.MODEL_NAME
+    if embeddings_restored:
+        for candidate, embedding in zip(candidates, embeddings):
+            job_matcher.embedding_cache[job_matcher.clean_text(candidate["data"]["raw_text"])] = embedding
+    
+    return {
+        "status": "success",
+        "path": path,
+        "candidates_restored": len(candidates),
+        "embeddings_restored": embeddings_restored,
+        "snapshot_created_at": manifest["created_at"]
+    }
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -577,7 +898,9 @@ async def health_check():
         "components": {
             "resume_parser": "ok" if resume_parser else "error",
             "job_matcher": "ok" if job_matcher.model else "error",
-            "spacy_nlp": "ok" if resume_parser.nlp else "warning"
+            "spacy_nlp": "ok" if resume_parser.nlp else "warning",
+            "name_extraction": resume_parser.name_extraction,
+            "blockchain": "ok" if chain_anchor else "warning"
         },
         "candidates_count": len(candidates_db),
         "timestamp": datetime.now().isoformat()
@@ -4,8 +4,18 @@ Test script for Resume Parser
 Run this to verify the parser is working correctly
 """
 
+import asyncio
 import json
+import os
+import tempfile
+import time
+import numpy as np
+import spacy
+from fastapi import HTTPException
+import resume_parser
 from resume_parser import ResumeParser
+from resume_anchor import BatchAnchorer, ChainAnchor, MerkleTree, BUILD_DIR, hash_resume, verify_proof
+from pool_snapshot import save_snapshot, load_snapshot, resolve_snapshot_path
 
 # Sample resume texts for testing
 sample_resumes = {
@@ -67,6 +77,32 @@ sample_resumes = {
     """
 }
 
+# Resume headers for comparing name extraction modes: (text, expected name)
+name_fixtures = [
+    (sample_resumes["software_engineer"], "Sarah Johnson"),
+    (sample_resumes["data_scientist"], "Michael Chen"),
+    ("RESUME\nPriya Sharma\npriya.sharma@mail.com\nBackend Developer", "Priya Sharma"),
+    ("Curriculum Vitae\n\nDavid O'Connor\nDublin, Ireland", "David O'Connor"),
+    ("EMILY ROBERTS\nFull Stack Developer | emily.r@mail.com | (555) 222-3344", "EMILY ROBERTS"),
+    ("Anna-Maria Lopez | anna.lopez@mail.com | linkedin.com/in/annalopez", "Anna-Maria Lopez"),
+    ("Senior Data Engineer\nJames Wilson\njames.wilson@mail.com", "James Wilson"),
+    ("Contact: 555-123-4567 | kevin.brown@mail.com\nKevin Brown\nDevOps Engineer", "Kevin Brown"),
+    ("Software Engineer with 5 years of experience.\nName: Laura Martinez\nSKILLS: Python, AWS", "Laura Martinez"),
+    ("Zoë Álvarez\nMachine Learning Researcher\nzoe.alvarez@mail.com", "Zoë Álvarez"),
+    # Job title or section heading above the name
+    ("Machine Learning Researcher\nJane Doe\njane.doe@mail.com", "Jane Doe"),
+    ("Product Owner\nJohn Smith\njohn.smith@mail.com\n(555) 777-8899", "John Smith"),
+    ("Personal Details\nMary Ann Carter\nmary.carter@mail.com", "Mary Ann Carter"),
+    ("Registered Nurse\nGrace Miller\ngrace.miller@mail.com", "Grace Miller"),
+    ("Project Coordinator\nRobert Taylor\nrtaylor@mail.com", "Robert Taylor"),
+    # Lowercase particles
+    ("Ludwig van Beethoven\nludwig.beethoven@mail.com\nComposer", "Ludwig van Beethoven"),
+    ("Mohammed bin Salman\nmohammed.salman@mail.com\nOperations Director", "Mohammed bin Salman"),
+    # Honorifics are not part of the name
+    ("Dr. Jane Doe\njane.doe@mail.com\nResearch Scientist", "Jane Doe"),
+    ("Prof Alan Turing | alan.turing@mail.com", "Alan Turing"),
+]
+
 def test_resume_parser():
     """Test the resume parser with sample data"""
     parser = ResumeParser()
@@ -100,6 +136,249 @@ def test_resume_parser():
     print("\n" + "=" * 50)
     print("✅ Resume Parser Testing Complete!")
 
+def test_name_extraction_modes(rounds=20):
+    """Compare accuracy and per-resume latency of 'full' vs 'fast' name extraction"""
+    accuracy = {}
+    texts = [text for text, _ in name_fixtures]
+    expected = [name for _, name in name_fixtures]
+    
+    print("\n👤 Name Extraction Modes:")
+    print("=" * 50)
+    
+    for mode in ResumeParser.NAME_EXTRACTION_MODES:
+        parser = ResumeParser(name_extraction=mode)
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            names = [parser.extract_name(text) for text in texts]
+        single_ms = (time.perf_counter() - start) / (rounds * len(texts)) * 1000
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            batched = parser.extract_names(texts)
+        batch_ms = (time.perf_counter() - start) / (rounds * len(texts)) * 1000
+        
+        correct = sum(name == target for name, target in zip(names, expected))
+        accuracy[mode] = correct
+        assert names == batched, f"{mode}: batched names differ from single-resume names"
+        print(f"{mode:>5}: accuracy {correct}/{len(texts)} | "
+              f"{single_ms:.2f} ms/resume | {batch_ms:.2f} ms/resume batched")
+        
+        for name, target in zip(batched, expected):
+            if name != target:
+                print(f"       ❌ expected '{target}', got '{name}'")
+    
+    assert accuracy['fast'] >= accuracy['full'], \
+        f"fast mode is less accurate than full ({accuracy['fast']} vs {accuracy['full']})"
+    
+    # Fast mode loads only NER and the tok2vec it listens to
+    nlp = spacy.blank("en")
+    nlp.add_pipe("tok2vec")
+    nlp.add_pipe("tagger")
+    nlp.add_pipe("ner", config={"model": {
+        "@architectures": "spacy.TransitionBasedParser.v2", "state_type": "ner",
+        "extra_state_tokens": False, "hidden_width": 64, "maxout_pieces": 2, "use_upper": True,
+        "tok2vec": {"@architectures": "spacy.Tok2VecListener.v1", "width": 96, "upstream": "*"}
+    }})
+    nlp.add_pipe("lemmatizer", config={"mode": "lookup"})
+    assert parser._ner_components(nlp.config) == ["ner", "tok2vec"]
+
+def test_merkle_proofs():
+    """Every proof verifies on odd/even leaf counts; tampered proofs are rejected"""
+    print("\n🌳 Testing Merkle Proofs:")
+    print("=" * 50)
+    
+    for leaf_count in [1, 2, 3, 7, 8, 1025]:
+        content_hashes = [hash_resume({'name': f'Candidate {i}'}) for i in range(leaf_count)]
+        tree = MerkleTree(content_hashes)
+        
+        for i, content_hash in enumerate(content_hashes):
+            proof = tree.get_proof(i)
+            assert verify_proof(content_hash, proof, tree.root), f"valid proof rejected ({leaf_count} leaves, leaf {i})"
+            assert not verify_proof(content_hashes[(i + 1) % leaf_count], proof, tree.root) or leaf_count == 1
+            
+            for step in range(len(proof)):
+                changed_sibling = [dict(s) for s in proof]
+                changed_sibling[step]['hash'] = '0x' + '00' * 32
+                assert not verify_proof(content_hash, changed_sibling, tree.root), "changed sibling accepted"
+                
+                flipped_position = [dict(s) for s in proof]
+                flipped_position[step]['position'] = 'right' if proof[step]['position'] == 'left' else 'left'
+                assert not verify_proof(content_hash, flipped_position, tree.root), "flipped position accepted"
+        
+        print(f"✅ {leaf_count} leaves: all proofs valid, tampered proofs rejected")
+
+def test_anchor_candidates(candidate_count=1500):
+    """/anchor-candidates with more candidates than the anchorer's batch_size"""
+    print("\n⚓ Testing Anchor Candidates Endpoint:")
+    print("=" * 50)
+    
+    saved_pool = list(resume_parser.candidates_db)
+    saved_anchorer = resume_parser.resume_anchorer
+    
+    class FailingChain:
+        def anchor_root(self, root, leaf_count):
+            raise ConnectionError("node unreachable")
+    
+    class RecordingChain:
+        def __init__(self):
+            self.roots = []
+        
+        def anchor_root(self, root, leaf_count):
+            self.roots.append(root)
+            return {'transaction_hash': '0x' + '11' * 32, 'block_number': 1, 'gas_used': 1, 'already_anchored': False}
+    
+    try:
+        resume_parser.candidates_db[:] = [
+            {"id": i, "filename": f"resume_{i}.txt", "uploaded_at": "", "data": {"name": f"Candidate {i}", "skills": []}}
+            for i in range(candidate_count)
+        ]
+        
+        # Without a chain, or when it fails, nothing may be marked anchored
+        for failing_anchorer, status_code in [(BatchAnchorer(batch_size=1024), 503),
+                                              (BatchAnchorer(batch_size=1024, chain=FailingChain()), 500)]:
+            resume_parser.resume_anchorer = failing_anchorer
+            try:
+                resume_parser.anchor_candidates()
+                assert False, "missing or failing chain was not reported"
+            except HTTPException as e:
+                assert e.status_code == status_code
+            assert not any("anchor" in c for c in resume_parser.candidates_db), "candidates marked anchored after failure"
+        print("✅ Missing chain (503) and chain failure (500) reported, candidates left pending")
+        
+        chain = RecordingChain()
+        resume_parser.resume_anchorer = BatchAnchorer(batch_size=1024, chain=chain)
+        result = resume_parser.anchor_candidates()
+        assert result["candidates_anchored"] == candidate_count
+        assert len(chain.roots) == 1 and '0x' + chain.roots[0].hex() == result["root"]
+        assert "proofs" not in resume_parser.resume_anchorer.batches[result["root"]], "anchorer retained proofs"
+        
+        for candidate in resume_parser.candidates_db:
+            anchor = candidate["anchor"]
+            assert anchor["root"] == result["root"]
+            assert verify_proof(hash_resume(candidate["data"]), anchor["proof"], bytes.fromhex(anchor["root"][2:]))
+        print(f"✅ {candidate_count} candidates anchored under one root, every proof verifies")
+    finally:
+        resume_parser.candidates_db[:] = saved_pool
+        resume_parser.resume_anchorer = saved_anchorer
+
+def test_chain_anchor():
+    """Anchor a root on an in-process chain (eth-tester stand-in for Ganache)"""
+    print("\n⛓️ Testing Chain Anchor:")
+    print("=" * 50)
+    
+    try:
+        from web3 import Web3, EthereumTesterProvider
+        web3 = Web3(EthereumTesterProvider())
+    except Exception as e:
+        print(f"⚠️ Skipped (install web3 and eth-tester[py-evm]): {e}")
+        return
+    
+    with open(os.path.join(BUILD_DIR, "CredentialVerifier.json")) as f:
+        artifact = json.load(f)
+    
+    account = web3.eth.accounts[0]
+    factory = web3.eth.contract(abi=artifact['abi'], bytecode=artifact['bytecode'])
+    receipt = web3.eth.wait_for_transaction_receipt(factory.constructor().transact({'from': account}))
+    
+    chain = ChainAnchor(web3=web3, address=receipt['contractAddress'])
+    anchorer = BatchAnchorer(chain=chain)
+    resumes = [{'name': f'Candidate {i}'} for i in range(100)]
+    batch = anchorer.seal(resumes)
+    
+    root = bytes.fromhex(batch['root'][2:])
+    exists, is_verified, issuer = chain.contract.functions.verifyCredentialByHash(root).call()
+    assert exists and is_verified and issuer == account
+    print(f"✅ Root anchored in one transaction ({batch['anchor']['gas_used']} gas for {batch['leaf_count']} resumes)")
+    
+    # Re-uploading the same resumes gives the same root; it must be reused, not reverted
+    again = BatchAnchorer(chain=chain).seal(resumes)
+    assert again['root'] == batch['root'] and again['anchor']['already_anchored']
+    print("✅ Identical batch reuses the root already on chain")
+
+def test_snapshot_round_trip():
+    """Save and load a candidate pool; records and embeddings must come back unchanged"""
+    print("\n💾 Testing Pool Snapshot:")
+    print("=" * 50)
+    
+    parser = ResumeParser()
+    candidates = [
+        {
+            "id": i,
+            "filename": filename,
+            "uploaded_at": f"2025-01-0{i + 1}T10:00:00",
+            "data": parser.parse_resume(text.encode(), filename)
+        }
+        for i, (filename, text) in enumerate([
+            ("software_engineer.txt", sample_resumes["software_engineer"]),
+            ("data_scientist.txt", sample_resumes["data_scientist"]),
+            ("zoe.txt", "Zoë Álvarez\nMünchen — 東京\nzoe.alvarez@mail.com"),
+            ("empty.txt", ""),
+        ])
+    ]
+    tree = MerkleTree([hash_resume(c["data"]) for c in candidates])
+    for i in (1, 2):
+        candidates[i]["anchor"] = {"root": "0x" + tree.root.hex(), "hash_algorithm": "keccak256",
+                                   "content_hash": "0x" + hash_resume(candidates[i]["data"]).hex(),
+                                   "leaf_index": i, "proof": tree.get_proof(i)}
+    assert candidates[3]["data"]["skills"] == [] and candidates[3]["data"]["experience"] == []
+    assert candidates[3]["data"]["education"] == []
+    embeddings = np.random.rand(len(candidates), 384).astype(np.float32)
+    
+    with tempfile.TemporaryDirectory() as root:
+        path = resolve_snapshot_path("latest", root=root)
+        save_snapshot(candidates, path, embeddings, "all-MiniLM-L6-v2")
+        restored, restored_embeddings, manifest = load_snapshot(path)
+        
+        assert restored == candidates, "restored records differ"
+        assert np.array_equal(restored_embeddings, embeddings), "restored embeddings differ"
+        assert manifest["embedding_model"] == "all-MiniLM-L6-v2"
+        print(f"✅ {len(restored)} candidates and {restored_embeddings.shape} embeddings round-tripped")
+        
+        # Restore through the endpoint, then overwrite the same snapshot with a smaller pool
+        saved_pool = list(resume_parser.candidates_db)
+        saved_resolve = resume_parser.resolve_snapshot_path
+        resume_parser.resolve_snapshot_path = lambda name: resolve_snapshot_path(name, root=root)
+        try:
+            asyncio.run(resume_parser.restore_candidates("latest"))
+            cached = {text: embedding.copy() for text, embedding in resume_parser.job_matcher.embedding_cache.items()}
+            assert len(cached) == len(candidates)
+            
+            save_snapshot(candidates[1:], path, np.zeros((len(candidates) - 1, 384), dtype=np.float32), "all-MiniLM-L6-v2")
+            for text, embedding in resume_parser.job_matcher.embedding_cache.items():
+                assert np.array_equal(embedding, cached[text]), "cached embedding changed when the snapshot was overwritten"
+            assert len(load_snapshot(path)[0]) == len(candidates) - 1
+        finally:
+            resume_parser.resolve_snapshot_path = saved_resolve
+            resume_parser.candidates_db[:] = saved_pool
+            resume_parser.job_matcher.embedding_cache.clear()
+        print("✅ Overwriting a restored snapshot leaves cached embeddings intact")
+        
+        # A failed write must keep the previous snapshot loadable
+        broken = [dict(candidates[1], anchor=dict(candidates[1]["anchor"], root="0xnot-hex"))]
+        try:
+            save_snapshot(broken, path)
+            assert False, "broken snapshot was written"
+        except ValueError:
+            pass
+        assert len(load_snapshot(path)[0]) == len(candidates) - 1, "previous snapshot lost after failed write"
+        assert os.listdir(root) == ["latest"], f"temporary directories left behind: {os.listdir(root)}"
+        print("✅ Failed snapshot leaves the previous one in place")
+        
+        for bad_name in ["", "/etc", "../outside", "a/../../outside", "..\\outside", "C:\\temp"]:
+            try:
+                resolve_snapshot_path(bad_name, root=root)
+                assert False, f"accepted snapshot name {bad_name!r}"
+            except ValueError:
+                pass
+        
+        try:
+            asyncio.run(resume_parser.restore_candidates("../outside"))
+            assert False, "restore accepted a path outside SNAPSHOT_DIR"
+        except HTTPException as e:
+            assert e.status_code == 400
+        print("✅ Snapshot names outside the snapshot directory rejected")
+
 def test_with_json_output():
     """Test parser and show full JSON output"""
     parser = ResumeParser()
@@ -118,6 +397,11 @@ def test_with_json_output():
 
 if __name__ == "__main__":
     test_resume_parser()
+    test_name_extraction_modes()
+    test_merkle_proofs()
+    test_anchor_candidates()
+    test_chain_anchor()
+    test_snapshot_round_trip()
     
     # Uncomment to see detailed JSON output
     # test_with_json_output()
\ No newline at end of file